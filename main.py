@@ -1,17 +1,45 @@
 from flask import Flask, redirect, request, render_template, jsonify
+from flask.json.provider import DefaultJSONProvider
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import base64
 from dotenv import load_dotenv
 import sqlite3
-from datetime import datetime
 import threading
+import fcntl
 import time
-from collections import Counter
+import sched
+import queue
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
+
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def parse_json(res):
+    # orjson decodes the raw body much faster than requests' stdlib path
+    if orjson:
+        return orjson.loads(res.content)
+    return res.json()
+
+
 app = Flask(__name__)
+if orjson:
+    app.json = ORJSONProvider(app)
 
 # Spotify credentials
 CLIENT_ID = os.getenv("CLIENT_ID")
@@ -19,25 +47,123 @@ CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 REDIRECT_URI = os.getenv("REDIRECT_URI")
 SCOPE = "user-read-currently-playing user-read-playback-state"
 
+# Basic auth headers for the token endpoint, built once
+AUTH_HEADER = {
+    "Authorization": "Basic " + base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
+} if CLIENT_ID and CLIENT_SECRET else {}
+
 # Thread starter flag
 thread_started = False
+_thread_lock = threading.Lock()
+_poll_lock_file = None
 
 # Globals
 access_token = None
 refresh_token = None
 token_expires_at = None
+refresh_event = None
 DB_PATH = "spotify_tracks.db"
+POLL_LOCK_PATH = DB_PATH + ".lock"
+READ_POOL_SIZE = os.cpu_count() or 2
+_read_pool = queue.Queue()
 current_track_id = None
 current_start_time = None
 current_track_duration = 180
+current_track_info = {}
+# Time of the previous poll, the earliest a newly seen play can have started
+last_tick_time = 0
+# Guards the current_track_* globals shared by the poller and /current-track
+_state_lock = threading.RLock()
+POLL_INTERVAL = 5
+MIN_POLL_INTERVAL = 3
+MAX_POLL_INTERVAL = 30
+IDLE_POLL_INTERVAL = 15
+
+# Dashboard aggregates, keyed by the poller's write counter; the TTL only
+# bounds staleness in processes whose poller runs elsewhere
+DASH_TTL = 60
+_data_version = 0
+_dash_cache = {"version": -1, "ts": 0, "data": None}
+_dashboard_lock = threading.Lock()
+
+# Spotify profile shown on the dashboard
+PROFILE_TTL = 600
+_profile_cache = {"at": 0, "val": None}
+
+# One thread runs both the poll ticks and the token refreshes
+scheduler = sched.scheduler(time.time, time.sleep)
+
+# Shared HTTP session keeps the TCP/TLS connection to Spotify alive between calls
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
 
 
 # ------------------------------------------------------
 # DATABASE
 # ------------------------------------------------------
+# Kept as constants so sqlite3's per-connection statement cache
+# reuses the compiled statements on every poll and dashboard load
+SQL_END_TRACK = """
+    UPDATE track_history
+    SET end_time=?
+    WHERE id=?
+"""
+
+SQL_INSERT_TRACK = """
+    INSERT INTO track_history
+    (track_id, track_name, artists, album_name, album_image, start_time)
+    VALUES (?, ?, ?, ?, ?, ?)
+    RETURNING id
+"""
+
+SQL_BUMP_ARTIST = """
+    INSERT INTO artist_plays (name, plays) VALUES (?, 1)
+    ON CONFLICT(name) DO UPDATE SET plays = plays + 1
+"""
+
+SQL_BUMP_TRACK = """
+    INSERT INTO track_plays (track_name, artists, album_image, plays) VALUES (?, ?, ?, 1)
+    ON CONFLICT(track_name, artists) DO UPDATE
+    SET plays = plays + 1, album_image = excluded.album_image
+"""
+
+SQL_TOTAL_SECONDS = """
+    SELECT COALESCE(SUM(end_time - start_time), 0)
+    FROM track_history
+    WHERE end_time IS NOT NULL
+"""
+
+SQL_TOP_ARTISTS = """
+    SELECT name, plays FROM artist_plays
+    ORDER BY plays DESC
+    LIMIT 10
+"""
+
+SQL_TOP_TRACKS = """
+    SELECT track_name, artists, album_image, plays AS count
+    FROM track_plays
+    ORDER BY plays DESC
+    LIMIT 50
+"""
+
+
+def _connect(**kwargs):
+    conn = sqlite3.connect(DB_PATH, **kwargs)
+    # WAL lets the dashboard read while the poller writes;
+    # synchronous/busy_timeout/cache settings are per-connection
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA temp_store=memory")
+    # Serve reads straight from the OS page cache
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
 def init_db():
     print(f"DB initialized at {os.path.abspath(DB_PATH)}")
-    conn = sqlite3.connect(DB_PATH)
+    conn = _connect()
     c = conn.cursor()
     c.execute("""
         CREATE TABLE IF NOT EXISTS track_history (
@@ -47,15 +173,96 @@ def init_db():
             artists TEXT NOT NULL,
             album_name TEXT,
             album_image TEXT,
-            start_time DATETIME,
-            end_time DATETIME
+            start_time INTEGER,
+            end_time INTEGER
+        )
+    """)
+    # Older databases stored local-time ISO strings; rewrite them as epoch
+    # seconds once and record that in user_version
+    c.execute("PRAGMA user_version")
+    if c.fetchone()[0] < 1:
+        c.execute("""
+            UPDATE track_history
+            SET start_time = CAST(strftime('%s', start_time, 'utc') AS INTEGER)
+            WHERE typeof(start_time) = 'text'
+        """)
+        c.execute("""
+            UPDATE track_history
+            SET end_time = CAST(strftime('%s', end_time, 'utc') AS INTEGER)
+            WHERE typeof(end_time) = 'text'
+        """)
+        c.execute("PRAGMA user_version = 1")
+    # Covers the listening-time SUM on the dashboard
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_history_times
+        ON track_history(end_time, start_time)
+    """)
+
+    # Play-count rollups kept up to date by the poller for the dashboard
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS artist_plays (
+            name TEXT PRIMARY KEY,
+            plays INTEGER NOT NULL
+        )
+    """)
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS track_plays (
+            track_name TEXT NOT NULL,
+            artists TEXT NOT NULL,
+            album_image TEXT,
+            plays INTEGER NOT NULL,
+            PRIMARY KEY (track_name, artists)
         )
     """)
+
+    # Backfill the rollups from history recorded before they existed
+    c.execute("SELECT 1 FROM track_plays LIMIT 1")
+    if not c.fetchone():
+        c.execute("""
+            INSERT INTO track_plays (track_name, artists, album_image, plays)
+            SELECT track_name, artists, MAX(album_image), COUNT(*)
+            FROM track_history
+            GROUP BY track_name, artists
+        """)
+        # Split the joined artist names once, streaming history through a
+        # second cursor instead of loading it all
+        history = conn.execute("SELECT artists FROM track_history")
+        c.executemany(SQL_BUMP_ARTIST, (
+            (a.strip(),)
+            for (artists,) in history
+            for a in artists.split(",")
+        ))
     conn.commit()
+
+    # Refresh planner stats and pull history into the OS cache so the
+    # first dashboard load is not a cold read
+    c.execute("PRAGMA optimize")
+    c.execute("SELECT COUNT(*) FROM track_history")
+    c.fetchone()
     conn.close()
 
 
+def init_read_pool():
+    # Read-only connections shared by the HTTP handlers; the poller
+    # keeps the only writer connection
+    for _ in range(READ_POOL_SIZE):
+        conn = _connect(check_same_thread=False)
+        conn.execute("PRAGMA query_only=1")
+        conn.row_factory = sqlite3.Row
+        _read_pool.put(conn)
+
+
+@contextmanager
+def read_conn():
+    conn = _read_pool.get()
+    try:
+        yield conn
+    finally:
+        _read_pool.put(conn)
+
+
 init_db()
+init_read_pool()
 
 
 # ------------------------------------------------------
@@ -81,24 +288,30 @@ def callback():
     global access_token, refresh_token, token_expires_at
 
     code = request.args.get("code")
-    auth_string = f"{CLIENT_ID}:{CLIENT_SECRET}"
-    b64_auth = base64.b64encode(auth_string.encode()).decode()
 
     token_url = "https://accounts.spotify.com/api/token"
-    headers = {"Authorization": f"Basic {b64_auth}"}
     data = {
         "grant_type": "authorization_code",
         "code": code,
         "redirect_uri": REDIRECT_URI
     }
 
-    res = requests.post(token_url, headers=headers, data=data)
-    tokens = res.json()
+    try:
+        res = session.post(token_url, headers=AUTH_HEADER, data=data, timeout=(3, 5))
+        res.raise_for_status()
+        tokens = parse_json(res)
+    except (requests.RequestException, ValueError) as e:
+        print("Error exchanging code:", e)
+        return jsonify({"error": "Spotify login failed"}), 502
 
     access_token = tokens.get("access_token")
     refresh_token = tokens.get("refresh_token")
     expires_in = tokens.get("expires_in", 3600)
-    token_expires_at = datetime.now().timestamp() + expires_in - 60
+    token_expires_at = time.time() + expires_in - 60
+    schedule_token_refresh()
+
+    # A new login may be a different account
+    _profile_cache["val"] = None
 
     return redirect("/dashboard")
 
@@ -108,99 +321,224 @@ def callback():
 # ------------------------------------------------------
 def refresh_access_token():
     global access_token, refresh_token, token_expires_at
-    auth_string = f"{CLIENT_ID}:{CLIENT_SECRET}"
-    b64_auth = base64.b64encode(auth_string.encode()).decode()
 
     url = "https://accounts.spotify.com/api/token"
-    headers = {"Authorization": f"Basic {b64_auth}"}
     data = {"grant_type": "refresh_token", "refresh_token": refresh_token}
 
     try:
-        res = requests.post(url, headers=headers, data=data)
-        tokens = res.json()
+        res = session.post(url, headers=AUTH_HEADER, data=data, timeout=(3, 5))
+        res.raise_for_status()
+        tokens = parse_json(res)
 
         access_token = tokens.get("access_token")
         expires_in = tokens.get("expires_in", 3600)
-        token_expires_at = datetime.now().timestamp() + expires_in - 60
+        token_expires_at = time.time() + expires_in - 60
 
         print("Token refreshed")
+        schedule_token_refresh()
 
-    except Exception as e:
+    except (requests.RequestException, ValueError) as e:
         print("Error refreshing:", e)
 
 
+def schedule_token_refresh():
+    global refresh_event
+
+    # Refresh ~5 minutes ahead of expiry so polling never waits on it
+    if refresh_event:
+        try:
+            scheduler.cancel(refresh_event)
+        except ValueError:
+            pass  # already ran
+    delay = max(0, token_expires_at - time.time() - 300)
+    refresh_event = scheduler.enter(delay, 1, refresh_access_token)
+
+
+# ------------------------------------------------------
+# STORAGE WORKER
+# ------------------------------------------------------
+# Plays detected by the poller, waiting to be written
+write_queue = queue.SimpleQueue()
+
+
+class StorageWorker(threading.Thread):
+    def __init__(self, q):
+        super().__init__(daemon=True)
+        self.queue = q
+        self.db = None
+        self.open_row_id = None
+
+    def run(self):
+        while True:
+            # Block for one play, then take whatever else has queued up
+            items = [self.queue.get()]
+            while not self.queue.empty():
+                items.append(self.queue.get_nowait())
+
+            # Any error escaping here would end the thread and leave plays
+            # queueing up unwritten, so retry once on a fresh connection
+            try:
+                self.write(items)
+            except Exception as e:
+                print("Storage error, reconnecting:", e)
+                try:
+                    self.reconnect()
+                    self.write(items)
+                except Exception as e:
+                    print("Dropped plays:", e)
+                    # Leave the last written row open rather than closing it
+                    # with the start time of a play that was never recorded
+                    self.open_row_id = None
+
+    def reconnect(self):
+        if self.db:
+            try:
+                self.db.close()
+            except sqlite3.Error:
+                pass
+        self.db = None
+        self.db = _connect()
+
+    def write(self, items):
+        global _data_version
+
+        if self.db is None:
+            self.db = _connect()
+
+        # Each play closes the one before it; the whole batch is one transaction
+        open_row_id = self.open_row_id
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            for (started_at, track_id, track_name, artists,
+                 album_name, album_image, artist_names) in items:
+                if open_row_id:
+                    self.db.execute(SQL_END_TRACK, (started_at, open_row_id))
+                open_row_id = self.db.execute(SQL_INSERT_TRACK, (
+                    track_id, track_name, artists, album_name, album_image, started_at
+                )).fetchone()[0]
+                self.db.executemany(SQL_BUMP_ARTIST, [(name,) for name in artist_names])
+                self.db.execute(SQL_BUMP_TRACK, (track_name, artists, album_image))
+
+        self.open_row_id = open_row_id
+        _data_version += 1
+
+
 # ------------------------------------------------------
 # BACKGROUND TRACK POLLING
 # ------------------------------------------------------
 def background_track_polling():
-    global current_track_id, current_start_time, current_track_duration
-
     print("Background thread started")
 
+    # Writes go through the storage worker so SQLite never blocks polling
+    StorageWorker(write_queue).start()
+
+    scheduler.enter(0, 0, poll_tick)
     while True:
         try:
-            if token_expires_at and datetime.now().timestamp() > token_expires_at:
+            scheduler.run()
+        except Exception as e:
+            print("Scheduler error:", e)
+
+
+def _retry_after_seconds(value):
+    # Retry-After is either a number of seconds or an HTTP-date
+    try:
+        seconds = int(value)
+    except (TypeError, ValueError):
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            seconds = 10
+    return max(MIN_POLL_INTERVAL, seconds)
+
+
+def poll_tick():
+    global current_track_id, current_start_time, current_track_duration, current_track_info
+    global last_tick_time
+
+    # One clock read per tick, shared by every bind below
+    tick_now = int(time.time())
+    previous_tick, last_tick_time = last_tick_time, tick_now
+    next_sleep = POLL_INTERVAL
+
+    try:
+        token = access_token
+        if token:
+            url = "https://api.spotify.com/v1/me/player/currently-playing"
+            headers = {"Authorization": f"Bearer {token}"}
+            res = session.get(url, headers=headers, timeout=10)
+
+            # Token expired early or the scheduled refresh failed
+            if res.status_code == 401:
                 refresh_access_token()
 
-            if access_token:
-                url = "https://api.spotify.com/v1/me/player/currently-playing"
-                headers = {"Authorization": f"Bearer {access_token}"}
-                res = requests.get(url, headers=headers, timeout=10)
-
-                if res.status_code == 200:
-                    data = res.json()
-
-                    if data.get("item") and data.get("is_playing"):
-                        track_id = data["item"]["id"]
-                        track_name = data["item"]["name"]
-                        artists = ", ".join([a["name"] for a in data["item"]["artists"]])
-                        album_name = data["item"]["album"]["name"]
-                        album_image = data["item"]["album"]["images"][0]["url"]
-                        duration_ms = data["item"]["duration_ms"]
-                        now = datetime.now()
-
-                        current_track_duration = int(duration_ms / 1000)
-
-                        # New track
-                        if track_id != current_track_id:
-                            # Close previous track
-                            if current_track_id:
-                                conn = sqlite3.connect(DB_PATH)
-                                c = conn.cursor()
-                                c.execute("""
-                                    UPDATE track_history
-                                    SET end_time=?
-                                    WHERE track_id=? AND end_time IS NULL
-                                """, (now, current_track_id))
-                                conn.commit()
-                                conn.close()
-
-                            # Insert new
-                            conn = sqlite3.connect(DB_PATH)
-                            c = conn.cursor()
-                            c.execute("""
-                                INSERT INTO track_history
-                                (track_id, track_name, artists, album_name, album_image, start_time)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                            """, (track_id, track_name, artists, album_name, album_image, now))
-                            conn.commit()
-                            conn.close()
+            # Rate limited, wait as long as Spotify asks
+            elif res.status_code == 429:
+                next_sleep = _retry_after_seconds(res.headers.get("Retry-After"))
 
-                            current_track_id = track_id
-                            current_start_time = now
+            elif res.status_code == 200:
+                data = parse_json(res)
 
-                        # Same track but resumed
-                        elif current_start_time is None:
-                            current_start_time = now
+                item = data.get("item")
 
+                if item and data.get("is_playing"):
+                    track_id = item["id"]
+
+                    # Back-date the start by how far into the track we already are,
+                    # but not past the previous poll: a seek or a resumed position
+                    # would otherwise end the prior play before it began
+                    progress = (data.get("progress_ms") or 0) // 1000
+                    started_at = max(tick_now - progress, previous_tick)
+
+                    # Same track still playing, nothing else to read
+                    if track_id == current_track_id:
+                        # Resumed after a pause
+                        if current_start_time is None:
+                            with _state_lock:
+                                current_start_time = started_at
+                                current_track_duration = int(item["duration_ms"] / 1000)
+
+                    # New track
                     else:
+                        track_name = item["name"]
+                        artist_names = [a["name"] for a in item["artists"]]
+                        artists = ", ".join(artist_names)
+                        album_name = item["album"]["name"]
+                        album_image = item["album"]["images"][0]["url"]
+
+                        write_queue.put((started_at, track_id, track_name, artists,
+                                         album_name, album_image, artist_names))
+
+                        with _state_lock:
+                            current_track_id = track_id
+                            current_start_time = started_at
+                            current_track_duration = int(item["duration_ms"] / 1000)
+                            current_track_info = {
+                                "track_name": track_name,
+                                "artists": artists,
+                                "album_name": album_name,
+                                "album_image": album_image
+                            }
+
+                    # Wake up just before the track should end
+                    remaining = item["duration_ms"] / 1000 - progress
+                    next_sleep = max(MIN_POLL_INTERVAL,
+                                     min(remaining - 1, MAX_POLL_INTERVAL))
+
+                else:
+                    with _state_lock:
                         current_start_time = None
                         current_track_duration = 180
+                    next_sleep = IDLE_POLL_INTERVAL
 
-        except Exception as e:
-            print("Polling error:", e)
+            # Nothing playing
+            elif res.status_code == 204:
+                next_sleep = IDLE_POLL_INTERVAL
+
+    except Exception as e:
+        print("Polling error:", e)
 
-        time.sleep(5)
+    scheduler.enter(next_sleep, 0, poll_tick)
 
 
 # ------------------------------------------------------
@@ -209,93 +547,110 @@ def background_track_polling():
 def get_user_profile():
     if not access_token:
         return None
+
+    # The profile rarely changes, so skip the API call on most dashboard loads
+    if _profile_cache["val"] and time.time() - _profile_cache["at"] < PROFILE_TTL:
+        return _profile_cache["val"]
+
+    url = "https://api.spotify.com/v1/me"
+    headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        url = "https://api.spotify.com/v1/me"
-        headers = {"Authorization": f"Bearer {access_token}"}
-        r = requests.get(url, headers=headers)
-        if r.status_code == 200:
-            data = r.json()
-            return {
-                "display_name": data.get("display_name", "Spotify User"),
-                "profile_image": data.get("images")[0]["url"] if data.get("images") else None
-            }
-    except:
-        pass
-    return None
+        r = session.get(url, headers=headers, timeout=(3, 5))
+        r.raise_for_status()
+        data = parse_json(r)
+    except (requests.RequestException, ValueError):
+        return None
+
+    profile = {
+        "display_name": data.get("display_name", "Spotify User"),
+        "profile_image": data.get("images")[0]["url"] if data.get("images") else None
+    }
+    _profile_cache["at"] = time.time()
+    _profile_cache["val"] = profile
+    return profile
 
 
 # ------------------------------------------------------
 # DASHBOARD
 # ------------------------------------------------------
-@app.route("/dashboard")
-def dashboard():
-    global thread_started
-
-    # Start background thread once
-    if not thread_started:
-        threading.Thread(target=background_track_polling, daemon=True).start()
-        thread_started = True
-
-    # total minutes
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT start_time, end_time FROM track_history")
-    rows = c.fetchall()
-    conn.close()
+def _cached_dashboard_stats():
+    if (_dash_cache["version"] == _data_version
+            and time.time() - _dash_cache["ts"] < DASH_TTL):
+        return _dash_cache["data"]
+    return None
 
-    total_seconds = 0
-    for start, end in rows:
-        start = datetime.strptime(start, "%Y-%m-%d %H:%M:%S.%f")
-        if end:
-            end = datetime.strptime(end, "%Y-%m-%d %H:%M:%S.%f")
-            total_seconds += int((end - start).total_seconds())
 
-    total_minutes = total_seconds // 60
+def get_dashboard_stats():
+    # History only changes when the poller writes, so reuse results until it does
+    stats = _cached_dashboard_stats()
+    if stats:
+        return stats
 
-    # top artists
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT artists FROM track_history")
-    artist_rows = c.fetchall()
-    conn.close()
+    # Single flight: one request recomputes, concurrent misses wait and reuse it
+    with _dashboard_lock:
+        stats = _cached_dashboard_stats()
+        if stats:
+            return stats
 
-    artist_counter = Counter()
-    for row in artist_rows:
-        artist_counter.update([a.strip() for a in row[0].split(",")])
+        version = _data_version
+        with read_conn() as conn:
+            total_seconds = conn.execute(SQL_TOTAL_SECONDS).fetchone()[0]
+            top_artists = conn.execute(SQL_TOP_ARTISTS).fetchall()
+            top_tracks = conn.execute(SQL_TOP_TRACKS).fetchall()
 
-    top_artists = artist_counter.most_common(10)
+        total_minutes = total_seconds // 60
 
-    # top tracks
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT track_name, artists, album_image FROM track_history")
-    track_rows = c.fetchall()
-    conn.close()
+        stats = {
+            "total_minutes": total_minutes,
+            "top_artists": top_artists,
+            "top_tracks": top_tracks,
+        }
+        # Tag with the version read before querying so a concurrent write
+        # leaves the entry stale instead of marking old data current; the
+        # version goes last so lock-free readers never pair it with old data
+        _dash_cache["data"] = stats
+        _dash_cache["ts"] = time.time()
+        _dash_cache["version"] = version
+        return stats
+
+
+def _acquire_poll_lock():
+    global _poll_lock_file
+
+    # Only one process may write to this database. This guards against a
+    # second process on the same DB, not multiple workers: tokens, refresh
+    # scheduling and /current-track state live in the process that served
+    # /callback, so the app must run with a single worker (see Procfile).
+    f = None
+    try:
+        f = open(POLL_LOCK_PATH, "w")
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError as e:
+        print("Poller not started, lock unavailable:", e)
+        if f:
+            f.close()
+        return False
+    _poll_lock_file = f
+    return True
 
-    track_counter = Counter()
-    track_info = {}
 
-    for name, artists, img in track_rows:
-        key = (name, artists)
-        track_counter[key] += 1
-        track_info[key] = img
+@app.route("/dashboard")
+def dashboard():
+    global thread_started
 
-    top_tracks = [
-        {
-            "track_name": name,
-            "artists": artists,
-            "count": count,
-            "album_image": track_info[(name, artists)]
-        }
-        for (name, artists), count in track_counter.most_common(50)
-    ]
+    # Start background thread once
+    with _thread_lock:
+        if not thread_started and _acquire_poll_lock():
+            threading.Thread(target=background_track_polling, daemon=True).start()
+            thread_started = True
 
+    stats = get_dashboard_stats()
     user_profile = get_user_profile()
 
     return render_template("dashboard.html",
-                           total_minutes=total_minutes,
-                           top_artists=top_artists,
-                           top_tracks=top_tracks,
+                           total_minutes=stats["total_minutes"],
+                           top_artists=stats["top_artists"],
+                           top_tracks=stats["top_tracks"],
                            user_profile=user_profile)
 
 
@@ -307,33 +662,23 @@ def current_track():
     if not access_token:
         return jsonify({"error": "Not logged in"}), 401
 
-    if not current_track_id or not current_start_time:
-        return jsonify({"message": "No track currently playing"})
+    # Snapshot so all fields come from the same poll
+    with _state_lock:
+        track_id = current_track_id
+        start_time = current_start_time
+        duration = current_track_duration
+        info = current_track_info
 
-    now = datetime.now()
-    seconds_played = int((now - current_start_time).total_seconds())
-
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        SELECT track_name, artists, album_name, album_image
-        FROM track_history
-        WHERE track_id=?
-        ORDER BY start_time DESC LIMIT 1
-    """, (current_track_id,))
-    row = c.fetchone()
-    conn.close()
+    if not track_id or not start_time:
+        return jsonify({"message": "No track currently playing"})
 
-    if not row:
-        return jsonify({"message": "Track not found"})
+    seconds_played = int(time.time()) - start_time
 
+    # Served from what the poller last saw, no DB round-trip
     return jsonify({
-        "track_name": row[0],
-        "artists": row[1],
-        "album_name": row[2],
-        "album_image": row[3],
+        **info,
         "seconds_played": seconds_played,
-        "duration": current_track_duration
+        "duration": duration
     })
 
 